@@ -1,9 +1,8 @@
 from __future__ import annotations
-try:
-    import _imp as imp
-except ImportError:
-    import imp
+import _imp
+from contextlib import contextmanager
 import sys
+import types
 try:
     # Only for this purpose, it's irrelevant if `os` was already patched.
     # https://github.com/eventlet/eventlet/pull/661
@@ -16,7 +15,14 @@ import eventlet
 
 __all__ = ['inject', 'import_patched', 'monkey_patch', 'is_monkey_patched']
 
-__exclude = {'__builtins__', '__file__', '__name__'}
+__exclude = frozenset({'__builtins__', '__file__', '__name__'})
+
+# unpatched modules returned by original(), by name
+_originals = {}
+# some rudimentary dependency checking for original() -- fortunately the
+# modules we're working on don't have many dependencies so we can just do
+# some special-casing here
+_original_deps = {'threading': '_thread', 'queue': 'threading'}
 
 
 class SysModulesSaver:
@@ -26,29 +32,42 @@ class SysModulesSaver:
 
     def __init__(self, module_names=()):
         self._saved = {}
-        imp.acquire_lock()
+        _imp.acquire_lock()
         self.save(*module_names)
 
     def save(self, *module_names):
         """Saves the named modules to the object."""
-        for modname in module_names:
-            self._saved[modname] = sys.modules.get(modname, None)
+        modules = sys.modules
+        self._saved.update({modname: modules.get(modname) for modname in module_names})
 
     def restore(self):
         """Restores the modules that the saver knows about into
         sys.modules.
         """
         try:
-            for modname, mod in self._saved.items():
-                if mod is not None:
-                    sys.modules[modname] = mod
-                else:
-                    try:
-                        del sys.modules[modname]
-                    except KeyError:
-                        pass
+            _restore_sys_modules(self._saved)
         finally:
-            imp.release_lock()
+            _imp.release_lock()
+
+
+@contextmanager
+def _import_lock():
+    """Holds the global import lock for the duration of the block."""
+    _imp.acquire_lock()
+    try:
+        yield
+    finally:
+        _imp.release_lock()
+
+
+def _restore_sys_modules(saved):
+    """Puts the modules of the *saved* dict back into sys.modules, removing
+    the names saved as None."""
+    sys.modules.update({
+        modname: mod for modname, mod in saved.items() if mod is not None
+    })
+    for modname in [modname for modname, mod in saved.items() if mod is None]:
+        sys.modules.pop(modname, None)
 
 
 def inject(module_name, new_globals, *additional_modules):
@@ -78,45 +97,43 @@ def inject(module_name, new_globals, *additional_modules):
 
     if not additional_modules:
         # supply some defaults
-        additional_modules = (
-            _green_os_modules() +
-            _green_select_modules() +
-            _green_socket_modules() +
-            _green_thread_modules() +
-            _green_time_modules())
-        # _green_MySQLdb()) # enable this after a short baking-in period
+        additional_modules = _default_additional_modules()
 
     # after this we are gonna screw with sys.modules, so capture the
     # state of all the modules we're going to mess with, and lock
-    saver = SysModulesSaver([name for name, m in additional_modules])
-    saver.save(module_name)
+    names = [name for name, m in additional_modules]
+    names.append(module_name)
+    saver = SysModulesSaver()
+    saver.save(*names)
+    # deferred monkey patches must not be applied to the modules imported here
+    lazy_patches = {name: _lazy_patches.pop(name) for name in names if name in _lazy_patches}
 
     # Cover the target modules so that when you import the module it
     # sees only the patched versions
-    for name, mod in additional_modules:
-        sys.modules[name] = mod
+    sys.modules.update(additional_modules)
 
     # Remove the old module from sys.modules and reimport it while
     # the specified modules are in place
     sys.modules.pop(module_name, None)
-    # Also remove sub modules and reimport. Use copy the keys to list
-    # because of the pop operations will change the content of sys.modules
-    # within th loop
-    for imported_module_name in list(sys.modules.keys()):
-        if imported_module_name.startswith(module_name + '.'):
-            sys.modules.pop(imported_module_name, None)
+    # Also remove sub modules and reimport. Collect their names first
+    # because the pop operations change the content of sys.modules
+    prefix = module_name + '.'
+    for imported_module_name in [name for name in sys.modules if name.startswith(prefix)]:
+        sys.modules.pop(imported_module_name, None)
     try:
         module = __import__(module_name, {}, {}, module_name.split('.')[:-1])
 
         if new_globals is not None:
             # Update the given globals dictionary with everything from this new module
-            for name in dir(module):
-                if name not in __exclude:
-                    new_globals[name] = getattr(module, name)
+            new_globals.update({
+                name: value for name, value in vars(module).items()
+                if name not in __exclude
+            })
 
         # Keep a reference to the new module to prevent it from dying
         sys.modules[patched_name] = module
     finally:
+        _lazy_patches.update(lazy_patches)
         saver.restore()  # Put the original modules back
 
     return module
@@ -143,22 +160,19 @@ def patch_function(func, *additional_modules):
     way of getting around."""
     if not additional_modules:
         # supply some defaults
-        additional_modules = (
-            _green_os_modules() +
-            _green_select_modules() +
-            _green_socket_modules() +
-            _green_thread_modules() +
-            _green_time_modules())
+        additional_modules = _default_additional_modules()
+    green_modules = dict(additional_modules)
+    names = tuple(green_modules)
 
     def patched(*args, **kw):
-        saver = SysModulesSaver()
-        for name, mod in additional_modules:
-            saver.save(name)
-            sys.modules[name] = mod
-        try:
-            return func(*args, **kw)
-        finally:
-            saver.restore()
+        with _import_lock():
+            modules = sys.modules
+            saved = {name: modules.get(name) for name in names}
+            modules.update(green_modules)
+            try:
+                return func(*args, **kw)
+            finally:
+                _restore_sys_modules(saved)
     return patched
 
 
@@ -187,20 +201,23 @@ def original(modname):
     # versions of all patchable modules during the import of the
     # module; this is because none of them import each other, except
     # for threading which imports thread
+    real_mod = _originals.get(modname)
+    if real_mod is not None:
+        return real_mod
+
     original_name = '__original_module_' + modname
     if original_name in sys.modules:
-        return sys.modules.get(original_name)
+        real_mod = _originals[modname] = sys.modules[original_name]
+        return real_mod
 
     # re-import the "pure" module and store it in the global _originals
     # dict; be sure to restore whatever module had that name already
     saver = SysModulesSaver((modname,))
+    # a deferred monkey patch must not be applied to the pure module
+    lazy_patch = _lazy_patches.pop(modname, None)
     sys.modules.pop(modname, None)
-    # some rudimentary dependency checking -- fortunately the modules
-    # we're working on don't have many dependencies so we can just do
-    # some special-casing here
-    deps = {'threading': '_thread', 'queue': 'threading'}
-    if modname in deps:
-        dependency = deps[modname]
+    dependency = _original_deps.get(modname)
+    if dependency is not None:
         saver.save(dependency)
         sys.modules[dependency] = original(dependency)
     try:
@@ -215,13 +232,119 @@ def original(modname):
         # save a reference to the unpatched module so it doesn't get lost
         sys.modules[original_name] = real_mod
     finally:
+        if lazy_patch is not None:
+            _lazy_patches[modname] = lazy_patch
         saver.restore()
 
-    return sys.modules[original_name]
+    real_mod = _originals[modname] = sys.modules[original_name]
+    return real_mod
 
 
+# Bit of each monkey_patch() argument in _patched_mask, set once it is
+# patched.  already_patched is kept up to date for code reading it.
+_patch_bits = {
+    name: 1 << i
+    for i, name in enumerate((
+        'os', 'select', 'socket', 'thread', 'time',
+        'MySQLdb', 'builtins', 'subprocess', 'psycopg'))
+}
+_patched_mask = 0
 already_patched = {}
 
+# keyword arguments of monkey_patch(), besides "all"
+_accepted_args = frozenset(_patch_bits)
+
+# Standard library modules replaced by each monkey_patch() argument, mapped
+# to the green modules replacing them.
+_patched_module_names = {
+    'os': {'os': 'eventlet.green.os'},
+    'select': {'select': 'eventlet.green.select',
+               'selectors': 'eventlet.green.selectors'},
+    'socket': {'socket': 'eventlet.green.socket',
+               'ssl': 'eventlet.green.ssl'},
+    'thread': {'queue': 'eventlet.green.Queue',
+               '_thread': 'eventlet.green.thread',
+               'threading': 'eventlet.green.threading'},
+    'time': {'time': 'eventlet.green.time'},
+    'MySQLdb': {'MySQLdb': 'eventlet.green.MySQLdb'},
+    'builtins': {'builtins': 'eventlet.green.builtin'},
+    'subprocess': {'subprocess': 'eventlet.green.subprocess'},
+}
+_green_module_owners = {
+    green_name: name
+    for names in _patched_module_names.values()
+    for name, green_name in names.items()
+}
+
+# Patches deferred until the first import of the module, mapping the module
+# name to the function returning its green replacement.  An entry is removed
+# only once its patch is applied.
+_lazy_patches = {}
+# names of _lazy_patches whose patch waits for a module being executed
+_lazy_patches_loading = set()
+
+
+class _GreenImportHook:
+    """Meta path finder applying deferred monkey patches.
+
+    A deferred patch is applied right after the first import of either the
+    patched module or the green module replacing it, whichever comes first;
+    green modules commonly import the module they replace, which must not
+    be patched with a half-initialized green module.
+    """
+
+    def find_spec(self, fullname, path, target=None):
+        name = _green_module_owners.get(fullname, fullname)
+        if name not in _lazy_patches or name in _lazy_patches_loading:
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None and spec.loader is not None:
+                break
+        else:
+            return None
+        spec.loader = _GreenLoader(spec.loader, name)
+        return spec
+
+
+class _GreenLoader:
+    """Loader wrapper calling :func:`_apply_patch` once the module has been
+    executed by the wrapped loader."""
+
+    def __init__(self, loader, name):
+        self._loader = loader
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        _lazy_patches_loading.add(self._name)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            _lazy_patches_loading.discard(self._name)
+            module.__loader__ = module.__spec__.loader = self._loader
+        if self._name not in sys.modules:
+            # the green module did not import the module it replaces, keep
+            # waiting for it
+            return
+        modules_function = _lazy_patches.pop(self._name, None)
+        if modules_function is None:
+            return
+        for name, mod in modules_function():
+            if name == self._name:
+                with _import_lock():
+                    _apply_patch(name, mod)
+
+
+_import_hook = _GreenImportHook()
+
 
 def monkey_patch(**on):
     """Globally patches certain system modules to be greenthread-friendly.
@@ -236,6 +359,7 @@ def monkey_patch(**on):
 
     It's safe to call monkey_patch multiple times.
     """
+    global _patched_mask
 
     # Workaround for import cycle observed as following in monotonic
     # RuntimeError: no suitable implementation for this system
@@ -246,9 +370,9 @@ def monkey_patch(**on):
     # the hub calls into monkey-patched modules.
     eventlet.hubs.get_hub()
 
-    accepted_args = {'os', 'select', 'socket',
-                     'thread', 'time', 'psycopg', 'MySQLdb',
-                     'builtins', 'subprocess'}
+    import importlib._bootstrap
+    import threading
+
     # To make sure only one of them is passed here
     assert not ('__builtin__' in on and 'builtins' in on)
     try:
@@ -261,12 +385,12 @@ def monkey_patch(**on):
     default_on = on.pop("all", None)
 
     for k in on.keys():
-        if k not in accepted_args:
+        if k not in _accepted_args:
             raise TypeError("monkey_patch() got an unexpected "
                             "keyword argument %r" % k)
     if default_on is None:
         default_on = True not in on.values()
-    for modname in accepted_args:
+    for modname in _accepted_args:
         if modname == 'MySQLdb':
             # MySQLdb is only on when explicitly patched for the moment
             on.setdefault(modname, False)
@@ -274,28 +398,31 @@ def monkey_patch(**on):
             on.setdefault(modname, False)
         on.setdefault(modname, default_on)
 
-    if on['thread'] and not already_patched.get('thread'):
+    if on['thread'] and not _patched_mask & _patch_bits['thread']:
         _green_existing_locks()
 
     modules_to_patch = []
-    for name, modules_function in [
-        ('os', _green_os_modules),
-        ('select', _green_select_modules),
-        ('socket', _green_socket_modules),
-        ('thread', _green_thread_modules),
-        ('time', _green_time_modules),
-        ('MySQLdb', _green_MySQLdb),
-        ('builtins', _green_builtins),
-        ('subprocess', _green_subprocess_modules),
-    ]:
-        if on[name] and not already_patched.get(name):
-            modules_to_patch += modules_function()
+    for name, modules_function in _green_modules_functions:
+        bit = _patch_bits[name]
+        if on[name] and not _patched_mask & bit:
+            patched_names = _patched_module_names[name]
+            if any(patched_name in sys.modules for patched_name in patched_names):
+                modules_to_patch += modules_function()
+            else:
+                # none of these modules is in use yet, so avoid importing
+                # them and their green versions until somebody needs them
+                for patched_name in patched_names:
+                    _lazy_patches[patched_name] = modules_function
+                if _import_hook not in sys.meta_path:
+                    sys.meta_path.insert(0, _import_hook)
+            _patched_mask |= bit
             already_patched[name] = True
 
-    if on['psycopg'] and not already_patched.get('psycopg'):
+    if on['psycopg'] and not _patched_mask & _patch_bits['psycopg']:
         try:
             from eventlet.support import psycopg2_patcher
             psycopg2_patcher.make_psycopg_green()
+            _patched_mask |= _patch_bits['psycopg']
             already_patched['psycopg'] = True
         except ImportError:
             # note that if we get an importerror from trying to
@@ -305,47 +432,10 @@ def monkey_patch(**on):
             # tell us whether or not we succeeded
             pass
 
-    _threading = original('threading')
-    imp.acquire_lock()
-    try:
+    with _import_lock():
         for name, mod in modules_to_patch:
-            orig_mod = sys.modules.get(name)
-            if orig_mod is None:
-                orig_mod = __import__(name)
-            for attr_name in mod.__patched__:
-                patched_attr = getattr(mod, attr_name, None)
-                if patched_attr is not None:
-                    setattr(orig_mod, attr_name, patched_attr)
-            deleted = getattr(mod, '__deleted__', [])
-            for attr_name in deleted:
-                if hasattr(orig_mod, attr_name):
-                    delattr(orig_mod, attr_name)
-
-            # https://github.com/eventlet/eventlet/issues/592
-            if name == 'threading' and register_at_fork:
-                def fix_threading_active(
-                    _global_dict=_threading.current_thread.__globals__,
-                    # alias orig_mod as patched to reflect its new state
-                    # https://github.com/eventlet/eventlet/pull/661#discussion_r509877481
-                    _patched=orig_mod,
-                ):
-                    _prefork_active = [None]
-
-                    def before_fork():
-                        _prefork_active[0] = _global_dict['_active']
-                        _global_dict['_active'] = _patched._active
-
-                    def after_fork():
-                        _global_dict['_active'] = _prefork_active[0]
-
-                    register_at_fork(
-                        before=before_fork,
-                        after_in_parent=after_fork)
-                fix_threading_active()
-    finally:
-        imp.release_lock()
+            _apply_patch(name, mod)
 
-    import importlib._bootstrap
     thread = original('_thread')
     # importlib must use real thread locks, not eventlet.Semaphore
     importlib._bootstrap._thread = thread
@@ -354,13 +444,65 @@ def monkey_patch(**on):
     # so call a C function to get the thread identifier, instead of calling
     # threading.get_ident(). Force the Python implementation of RLock which
     # calls threading.get_ident() and so is compatible with eventlet.
-    import threading
     threading.RLock = threading._PyRLock
 
     # Issue #508: Since Python 3.7 queue.SimpleQueue is implemented in C,
     # causing a deadlock.  Replace the C implementation with the Python one.
-    import queue
-    queue.SimpleQueue = queue._PySimpleQueue
+    if 'queue' not in _lazy_patches:
+        import queue
+        queue.SimpleQueue = queue._PySimpleQueue
+
+
+def _apply_patch(name, mod):
+    """Replace the attributes of the module *name* with the ones of its green
+    version *mod*.  Callers hold the import lock."""
+    orig_mod = sys.modules.get(name)
+    if orig_mod is None:
+        orig_mod = __import__(name)
+    deleted = getattr(mod, '__deleted__', [])
+    try:
+        src, dest = vars(mod), vars(orig_mod)
+    except TypeError:
+        for attr_name in mod.__patched__:
+            patched_attr = getattr(mod, attr_name, None)
+            if patched_attr is not None:
+                setattr(orig_mod, attr_name, patched_attr)
+        for attr_name in deleted:
+            if hasattr(orig_mod, attr_name):
+                delattr(orig_mod, attr_name)
+    else:
+        dest.update({
+            attr_name: src[attr_name]
+            for attr_name in mod.__patched__
+            if src.get(attr_name) is not None
+        })
+        for attr_name in deleted:
+            dest.pop(attr_name, None)
+
+    # https://github.com/eventlet/eventlet/issues/592
+    if name == 'threading' and register_at_fork:
+        def fix_threading_active(
+            _global_dict=original('threading').current_thread.__globals__,
+            # alias orig_mod as patched to reflect its new state
+            # https://github.com/eventlet/eventlet/pull/661#discussion_r509877481
+            _patched=orig_mod,
+        ):
+            _prefork_active = [None]
+
+            def before_fork():
+                _prefork_active[0] = _global_dict['_active']
+                _global_dict['_active'] = _patched._active
+
+            def after_fork():
+                _global_dict['_active'] = _prefork_active[0]
+
+            register_at_fork(
+                before=before_fork,
+                after_in_parent=after_fork)
+        fix_threading_active()
+
+    if name == 'queue':
+        orig_mod.SimpleQueue = orig_mod._PySimpleQueue
 
 
 def is_monkey_patched(module):
@@ -371,8 +513,9 @@ def is_monkey_patched(module):
     module some other way than with the import keyword (including
     import_patched), this might not be correct about that particular
     module."""
-    return module in already_patched or \
-        getattr(module, '__name__', None) in already_patched
+    if not isinstance(module, str):
+        module = getattr(module, '__name__', None)
+    return bool(_patched_mask & _patch_bits.get(module, 0))
 
 
 def _green_existing_locks():
@@ -396,7 +539,18 @@ def _green_existing_locks():
     def upgrade(old_lock):
         return _convert_py3_rlock(old_lock, tid)
 
-    _upgrade_instances(sys.modules, rlock_type, upgrade)
+    old_locks = [o for o in gc.get_objects() if isinstance(o, rlock_type)]
+    if old_locks:
+        _upgrade_referrers(old_locks, upgrade)
+        del old_locks
+    elif sys.version_info >= (3, 10):
+        # No RLock was created before monkey-patching, nothing to upgrade
+        # or to report.
+        return
+    else:
+        # On older Pythons (< 3.10), RLocks are not tracked by the garbage
+        # collector, fall back to walking everything reachable from modules.
+        _upgrade_instances(sys.modules, rlock_type, upgrade)
 
     # Report if there are RLocks we couldn't upgrade. For cases where we're
     # using coverage.py in parent process, and more generally for tests in
@@ -408,7 +562,21 @@ def _green_existing_locks():
     # it's a useful warning, so we try to do it anyway for the benefit of those
     # users on 3.10 or later.
     gc.collect()
-    remaining_rlocks = len({o for o in gc.get_objects() if isinstance(o, rlock_type)})
+    # Since Python 3.12 importlib's module locks are RLocks, which are
+    # deliberately not greened; don't count them.
+    import importlib._bootstrap
+    module_lock_type = importlib._bootstrap._ModuleLock
+    remaining = [o for o in gc.get_objects() if isinstance(o, rlock_type)]
+    remaining_rlocks = len(remaining)
+    if remaining:
+        module_locks = {
+            id(v)
+            for r in gc.get_referrers(*remaining)
+            if type(r) is module_lock_type
+            for v in vars(r).values()
+        }
+        remaining_rlocks -= sum(1 for o in remaining if id(o) in module_locks)
+        del remaining
     if remaining_rlocks:
         import logging
         logger = logging.Logger("eventlet")
@@ -417,7 +585,87 @@ def _green_existing_locks():
                      "before importing any other modules.")
 
 
-def _upgrade_instances(container, klass, upgrade, visited=None, old_to_new=None):
+def _upgrade_referrers(old_objects, upgrade):
+    """
+    Replace references to the objects of the ``old_objects`` list in the
+    ``dict`` values, ``list`` items and attributes referring to them, as
+    found by the garbage collector, with ``upgrade(old_object)``.
+
+    ``upgrade`` is only called for objects with at least one such reference,
+    so objects only referred to from elsewhere (e.g. frames) are left intact.
+    """
+    import gc
+    import importlib._bootstrap
+    module_lock_type = importlib._bootstrap._ModuleLock
+    old_by_id = {id(old): old for old in old_objects}
+    ignored = {id(old_objects), id(old_by_id)}
+
+    def find_old(value):
+        old = old_by_id.get(id(value))
+        return old if old is value else None
+
+    # Find every site to patch before upgrading anything.
+    sites = []  # (referrer, key or index or attribute name, old object)
+    for ref in gc.get_referrers(*old_objects):
+        # importlib must keep using real thread locks
+        if id(ref) in ignored or type(ref) is module_lock_type:
+            continue
+        try:
+            if isinstance(ref, dict):
+                items = ref.items()
+            elif isinstance(ref, list):
+                items = enumerate(ref)
+            elif hasattr(ref, '__dict__') and not isinstance(ref, type):
+                items = vars(ref).items()
+            else:
+                continue
+            for k, v in list(items):
+                old = find_old(v)
+                if old is not None:
+                    sites.append((ref, k, old))
+        except:
+            _log_upgrade_exception()
+
+    old_to_new = {}  # map id(old) to upgrade(old)
+    patched_dicts = []
+    for ref, k, old in sites:
+        new = old_to_new.get(id(old))
+        if new is None:
+            new = old_to_new[id(old)] = upgrade(old)
+        try:
+            if isinstance(ref, (dict, list)):
+                ref[k] = new
+                if isinstance(ref, dict):
+                    patched_dicts.append(ref)
+            else:
+                setattr(ref, k, new)
+        except:
+            _log_upgrade_exception()
+
+    if patched_dicts:
+        # Writing to a class namespace directly bypasses the attribute cache
+        # of the class, so set the attribute properly too.
+        new_ids = {id(new) for new in old_to_new.values()}
+        for owner in gc.get_referrers(*patched_dicts):
+            if not isinstance(owner, type):
+                continue
+            try:
+                for k, v in list(vars(owner).items()):
+                    if id(v) in new_ids:
+                        setattr(owner, k, v)
+            except:
+                _log_upgrade_exception()
+
+
+def _log_upgrade_exception():
+    import logging
+    logger = logging.Logger("eventlet")
+    logger.exception("An exception was thrown while monkey_patching for eventlet. "
+                     "to fix this error make sure you run eventlet.monkey_patch() "
+                     "before importing any other modules.", exc_info=True)
+
+
+def _upgrade_instances(container, klass, upgrade):
     """
     Starting with a Python object, find all instances of ``klass``, following
     references in ``dict`` values, ``list`` items, and attributes.
@@ -428,15 +676,12 @@ def _upgrade_instances(container, klass, upgrade, visited=None, old_to_new=None)
     In practice this is used only for ``threading.RLock``, so we can assume
     instances are hashable.
     """
-    if visited is None:
-        visited = {}  # map id(obj) to obj
-    if old_to_new is None:
-        old_to_new = {}  # map old klass instance to upgrade(old)
-
-    # Handle circular references:
-    visited[id(container)] = container
+    import collections
+    visited = {}  # map id(obj) to obj
+    old_to_new = {}  # map old klass instance to upgrade(old)
+    queue = collections.deque([container])
 
-    def upgrade_or_traverse(obj):
+    def upgrade_or_enqueue(obj):
         if id(obj) in visited:
             return None
         if isinstance(obj, klass):
@@ -447,38 +692,41 @@ def _upgrade_instances(container, klass, upgrade, visited=None, old_to_new=None)
                 old_to_new[obj] = new
                 return new
         else:
-            _upgrade_instances(obj, klass, upgrade, visited, old_to_new)
+            queue.append(obj)
             return None
 
-    if isinstance(container, dict):
-        for k, v in list(container.items()):
-            new = upgrade_or_traverse(v)
-            if new is not None:
-                container[k] = new
-    if isinstance(container, list):
-        for i, v in enumerate(container):
-            new = upgrade_or_traverse(v)
-            if new is not None:
-                container[i] = new
-    try:
-        container_vars = vars(container)
-    except TypeError:
-        pass
-    else:
-        # If we get here, we're operating on an object that could
-        # be doing strange things. If anything bad happens, error and
-        # warn the eventlet user to monkey_patch earlier.
-        try:
-            for k, v in list(container_vars.items()):
-                new = upgrade_or_traverse(v)
+    while queue:
+        container = queue.popleft()
+        # Handle circular references:
+        if id(container) in visited:
+            continue
+        visited[id(container)] = container
+
+        if isinstance(container, dict):
+            for k, v in list(container.items()):
+                new = upgrade_or_enqueue(v)
                 if new is not None:
-                    setattr(container, k, new)
-        except:
-            import logging
-            logger = logging.Logger("eventlet")
-            logger.exception("An exception was thrown while monkey_patching for eventlet. "
-                             "to fix this error make sure you run eventlet.monkey_patch() "
-                             "before importing any other modules.", exc_info=True)
+                    container[k] = new
+        if isinstance(container, list):
+            for i, v in enumerate(container):
+                new = upgrade_or_enqueue(v)
+                if new is not None:
+                    container[i] = new
+        try:
+            container_vars = vars(container)
+        except TypeError:
+            pass
+        else:
+            # If we get here, we're operating on an object that could
+            # be doing strange things. If anything bad happens, error and
+            # warn the eventlet user to monkey_patch earlier.
+            try:
+                for k, v in list(container_vars.items()):
+                    new = upgrade_or_enqueue(v)
+                    if new is not None:
+                        setattr(container, k, new)
+            except:
+                _log_upgrade_exception()
 
 
 def _convert_py3_rlock(old, tid):
@@ -513,61 +761,123 @@ def _convert_py3_rlock(old, tid):
     return new
 
 
-def _green_os_modules():
-    from eventlet.green import os
-    return [('os', os)]
+# The _green_*() functions import green modules once and cache the
+# (name, module) pairs they return.
+_green_os = None
+_green_select = None
+_green_socket = None
+_green_subprocess = None
+_green_thread = None
+_green_time = None
+_green_mysqldb = None
+_green_builtin = None
+_green_defaults = None
 
 
-def _green_select_modules():
-    from eventlet.green import select
-    modules = [('select', select)]
+def _green_os_modules():
+    global _green_os
+    if _green_os is None:
+        from eventlet.green import os
+        _green_os = (('os', os),)
+    return _green_os
 
-    from eventlet.green import selectors
-    modules.append(('selectors', selectors))
 
-    return modules
+def _green_select_modules():
+    global _green_select
+    if _green_select is None:
+        from eventlet.green import select
+        from eventlet.green import selectors
+        _green_select = (('select', select), ('selectors', selectors))
+    return _green_select
 
 
 def _green_socket_modules():
-    from eventlet.green import socket
-    try:
-        from eventlet.green import ssl
-        return [('socket', socket), ('ssl', ssl)]
-    except ImportError:
-        return [('socket', socket)]
+    global _green_socket
+    if _green_socket is None:
+        from eventlet.green import socket
+        try:
+            from eventlet.green import ssl
+            _green_socket = (('socket', socket), ('ssl', ssl))
+        except ImportError:
+            _green_socket = (('socket', socket),)
+    return _green_socket
 
 
 def _green_subprocess_modules():
-    from eventlet.green import subprocess
-    return [('subprocess', subprocess)]
+    global _green_subprocess
+    if _green_subprocess is None:
+        from eventlet.green import subprocess
+        _green_subprocess = (('subprocess', subprocess),)
+    return _green_subprocess
 
 
 def _green_thread_modules():
-    from eventlet.green import Queue
-    from eventlet.green import thread
-    from eventlet.green import threading
-    return [('queue', Queue), ('_thread', thread), ('threading', threading)]
+    global _green_thread
+    if _green_thread is None:
+        from eventlet.green import Queue
+        from eventlet.green import thread
+        from eventlet.green import threading
+        _green_thread = (('queue', Queue), ('_thread', thread), ('threading', threading))
+    return _green_thread
 
 
 def _green_time_modules():
-    from eventlet.green import time
-    return [('time', time)]
+    global _green_time
+    if _green_time is None:
+        from eventlet.green import time
+        _green_time = (('time', time),)
+    return _green_time
 
 
 def _green_MySQLdb():
-    try:
-        from eventlet.green import MySQLdb
-        return [('MySQLdb', MySQLdb)]
-    except ImportError:
-        return []
+    global _green_mysqldb
+    if _green_mysqldb is None:
+        try:
+            from eventlet.green import MySQLdb
+        except ImportError:
+            return ()
+        _green_mysqldb = (('MySQLdb', MySQLdb),)
+    return _green_mysqldb
 
 
 def _green_builtins():
-    try:
-        from eventlet.green import builtin
-        return [('builtins', builtin)]
-    except ImportError:
-        return []
+    global _green_builtin
+    if _green_builtin is None:
+        try:
+            from eventlet.green import builtin
+        except ImportError:
+            return ()
+        _green_builtin = (('builtins', builtin),)
+    return _green_builtin
+
+
+def _default_additional_modules():
+    """Modules used by :func:`inject` and :func:`patch_function` when none
+    are given."""
+    global _green_defaults
+    if _green_defaults is None:
+        _green_defaults = (
+            _green_os_modules() +
+            _green_select_modules() +
+            _green_socket_modules() +
+            _green_thread_modules() +
+            _green_time_modules())
+        # _green_MySQLdb()) # enable this after a short baking-in period
+    return _green_defaults
+
+
+# monkey_patch() arguments and the functions returning the green modules
+# they install, in patching order
+_green_modules_functions = (
+    ('os', _green_os_modules),
+    ('select', _green_select_modules),
+    ('socket', _green_socket_modules),
+    ('thread', _green_thread_modules),
+    ('time', _green_time_modules),
+    ('MySQLdb', _green_MySQLdb),
+    ('builtins', _green_builtins),
+    ('subprocess', _green_subprocess_modules),
+)
 
 
 def slurp_properties(source, destination, ignore=[], srckeys=None):
@@ -580,8 +890,12 @@ def slurp_properties(source, destination, ignore=[], srckeys=None):
     """
     if srckeys is None:
         srckeys = source.__all__
+    ignore = frozenset(ignore)
+    # read module namespaces directly; names missing from them may still be
+    # provided by a module __getattr__
+    src = vars(source) if isinstance(source, types.ModuleType) else {}
     destination.update({
-        name: getattr(source, name)
+        name: src[name] if name in src else getattr(source, name)
         for name in srckeys
         if not (name.startswith('__') or name in ignore)
     })
@@ -0,0 +1,17 @@
+__test__ = False
+
+
+def main():
+    import threading
+    import eventlet
+
+    # Only referred to from this frame, so it can't be upgraded and must be
+    # left locked.
+    lock = threading.RLock()
+    with lock:
+        eventlet.monkey_patch()
+    print('pass')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+__test__ = False
+
+if __name__ == '__main__':
+    import importlib.util
+    import sys
+
+    import eventlet
+    eventlet.monkey_patch()
+    assert 'subprocess' not in sys.modules
+    assert 'eventlet.green.subprocess' not in sys.modules
+
+    # looking a module up without importing it must not lose its patch
+    assert importlib.util.find_spec('subprocess') is not None
+    assert 'subprocess' not in sys.modules
+
+    # neither must importing a patched copy
+    eventlet.import_patched('subprocess')
+    assert 'subprocess' not in sys.modules
+
+    import subprocess
+    from eventlet.green import subprocess as green_subprocess
+    assert subprocess.Popen is green_subprocess.Popen
+    assert subprocess.Popen.__module__ == 'eventlet.green.subprocess'
+    assert eventlet.patcher.original('subprocess').Popen is not green_subprocess.Popen
+
+    print('pass')
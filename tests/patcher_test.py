@@ -88,6 +88,52 @@ def test_import_patched_handles_sub_modules():
     tests.run_isolated('test_sub_module_in_import_patched/test.py')
 
 
+def test_upgrade_instances():
+    from eventlet import patcher
+
+    class Old:
+        pass
+
+    class Holder:
+        pass
+
+    old = Old()
+    holder = Holder()
+    holder.attr = old
+    nested = deepest = [old]
+    for _ in range(sys.getrecursionlimit() * 2):
+        nested = [nested]
+    root = {'value': old, 'list': [0, old], 'holder': holder, 'nested': nested}
+
+    upgraded = []
+
+    def upgrade(obj):
+        upgraded.append(obj)
+        return 'new'
+
+    patcher._upgrade_instances(root, Old, upgrade)
+    assert root['value'] == 'new'
+    assert root['list'] == [0, 'new']
+    assert holder.attr == 'new'
+    assert deepest == ['new']
+    # each instance is upgraded once, however many references it has
+    assert upgraded == [old]
+
+
+def test_patch_function():
+    from eventlet import patcher
+    from eventlet.green import socket as green_socket
+
+    def import_socket():
+        import socket
+        return socket
+
+    saved_socket = sys.modules['socket']
+    patched = patcher.patch_function(import_socket, ('socket', green_socket))
+    assert patched() is green_socket
+    assert sys.modules['socket'] is saved_socket
+
+
 class MonkeyPatch(ProcessBase):
     def test_patched_modules(self):
         new_mod = """
@@ -536,3 +582,11 @@ def test_patcher_existing_locks():
 
 def test_patcher_existing_locks_exception():
     tests.run_isolated("patcher_existing_locks_exception.py")
+
+
+def test_patcher_existing_locks_frame():
+    tests.run_isolated("patcher_existing_locks_frame.py")
+
+
+def test_lazy_import():
+    tests.run_isolated("patcher_lazy_import.py")